@@ -5,10 +5,11 @@ Provides functionality to copy data to and from system clipboard
 with manual clearing control.
 """
 
+import shutil
 import subprocess
 import threading
 import logging
-from typing import Optional
+from typing import Callable, Optional
 from contextlib import contextmanager
 
 logger = logging.getLogger(__name__)
@@ -19,6 +20,23 @@ class ClipboardError(Exception):
     pass
 
 
+# Absolute path of xclip, resolved once so each spawn skips the PATH search.
+_xclip_executable: Optional[str] = None
+
+
+def _resolve_xclip() -> str:
+    """
+    Return the absolute path of xclip, falling back to the bare name.
+    
+    Only a successful lookup is cached, so installing xclip while the
+    application runs is picked up on the next copy.
+    """
+    global _xclip_executable
+    if _xclip_executable is None:
+        _xclip_executable = shutil.which("xclip")
+    return _xclip_executable or "xclip"
+
+
 class ClipboardManager:
     """
     Manages clipboard operations with thread-safe access.
@@ -27,13 +45,18 @@ class ClipboardManager:
     system clipboard access. All clearing is manual.
     """
 
-    def __init__(self):
+    def __init__(self, backend: Optional[Callable[[str], None]] = None):
         """
         Initialize the clipboard manager.
         
+        Args:
+            backend: Callable that writes a string to the system clipboard.
+                Defaults to the xclip-based `_write_to_clipboard`.
+        
         Raises:
             ValueError: If initialization fails.
         """
+        self._backend = backend
         self._lock = threading.RLock()
         self._clipboard_content: Optional[str] = None
         self._is_managed = False
@@ -55,7 +78,7 @@ class ClipboardManager:
         with self._lock:
             try:
                 # Copy to system clipboard
-                self._write_to_clipboard(text)
+                self._write(text)
                 self._clipboard_content = text
                 self._is_managed = True
                 
@@ -76,7 +99,7 @@ class ClipboardManager:
         with self._lock:
             try:
                 # Clear clipboard
-                self._write_to_clipboard("")
+                self._write("")
                 self._clipboard_content = None
                 self._is_managed = False
                 
@@ -86,6 +109,18 @@ class ClipboardManager:
                 logger.error(f"Failed to clear clipboard: {e}")
                 raise ClipboardError(f"Failed to clear clipboard: {e}") from e
 
+    def _write(self, text: str) -> None:
+        """Write text through the configured clipboard backend."""
+        (self._backend or self._write_to_clipboard)(text)
+
+    def reset_state(self) -> None:
+        """
+        Forget the managed content without touching the system clipboard.
+        """
+        with self._lock:
+            self._clipboard_content = None
+            self._is_managed = False
+
     def is_managed(self) -> bool:
         """
         Check if clipboard is currently managed (content copied by this manager).
@@ -131,7 +166,7 @@ class ClipboardManager:
         """
         try:
             process = subprocess.Popen(
-                ["xclip", "-selection", "clipboard"],
+                [_resolve_xclip(), "-selection", "clipboard"],
                 stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
@@ -167,7 +202,7 @@ class ClipboardManager:
         """
         try:
             process = subprocess.Popen(
-                ["xclip", "-selection", "clipboard", "-o"],
+                [_resolve_xclip(), "-selection", "clipboard", "-o"],
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
             )
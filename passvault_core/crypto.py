@@ -1,37 +1,250 @@
 import os
 import json
 import base64
-from typing import Tuple
+import ctypes
+import hmac
+import functools
+import logging
+import platform
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
 
 try:
     from argon2.low_level import hash_secret_raw, Type
 except Exception as e:
     hash_secret_raw = None  # type: ignore
 
+try:
+    from argon2.low_level import core as argon2_core, ffi as argon2_ffi, lib as argon2_lib, ARGON2_VERSION
+    from argon2.exceptions import HashingError
+except Exception as e:
+    argon2_core = None  # type: ignore
+
+try:
+    from appdirs import user_config_dir
+except Exception as e:
+    user_config_dir = None  # type: ignore
+
 try:
     from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 except Exception as e:
     AESGCM = None  # type: ignore
 
 from .errors import DecryptionError
+from .rand import rand_bytes
+
+logger = logging.getLogger(__name__)
 
 
 DEFAULT_TIME = 2
 DEFAULT_MEMORY = 65536  # KiB (64 MiB)
-DEFAULT_PARALLELISM = 1
+DEFAULT_PARALLELISM = max(1, min(4, os.cpu_count() or 1))  # Argon2 lanes; memory_cost is the total across lanes
 DEFAULT_KEY_LEN = 32
 
+GCM_TAG_LEN = 16
+# Payloads at least this large go through the streaming Cipher API so the
+# plaintext is written into a single preallocated buffer.
+STREAM_THRESHOLD = 64 * 1024
+
+
+def _argon2_cffi(password: bytes, salt: bytes, time_cost: int, memory_cost: int, parallelism: int, key_len: int) -> bytes:
+    # hash_secret_raw only takes bytes, so a bytearray password is copied here
+    return hash_secret_raw(bytes(password), bytes(salt), time_cost, memory_cost, parallelism, key_len, Type.ID)
 
-def derive_key(password: str, salt: bytes, time_cost: int = DEFAULT_TIME, memory_cost: int = DEFAULT_MEMORY, parallelism: int = DEFAULT_PARALLELISM, key_len: int = DEFAULT_KEY_LEN) -> bytes:
+
+def _argon2_ctx(password: bytes, salt: bytes, time_cost: int, memory_cost: int, parallelism: int, key_len: int) -> bytes:
+    out = argon2_ffi.new("uint8_t[]", key_len)
+    # from_buffer reads the caller's buffer in place, so a bytearray
+    # password is not copied into memory that is never wiped.
+    pwd = argon2_ffi.from_buffer("uint8_t[]", password)
+    salt_buf = argon2_ffi.from_buffer("uint8_t[]", salt)
+    ctx = argon2_ffi.new("argon2_context *", dict(
+        out=out, outlen=key_len,
+        pwd=pwd, pwdlen=len(password),
+        salt=salt_buf, saltlen=len(salt),
+        secret=argon2_ffi.NULL, secretlen=0,
+        ad=argon2_ffi.NULL, adlen=0,
+        t_cost=time_cost, m_cost=memory_cost,
+        lanes=parallelism, threads=parallelism,
+        version=ARGON2_VERSION,
+        # NULL callbacks: libargon2 mallocs the blocks and wipes them on free
+        allocate_cbk=argon2_ffi.NULL, free_cbk=argon2_ffi.NULL,
+        flags=argon2_lib.ARGON2_DEFAULT_FLAGS,
+    ))
+    rc = argon2_core(ctx, Type.ID.value)
+    if rc != argon2_lib.ARGON2_OK:
+        raise HashingError(argon2_ffi.string(argon2_lib.argon2_error_message(rc)).decode("ascii"))
+    return bytes(argon2_ffi.buffer(out, key_len))
+
+
+# Argon2id implementations that are importable, in order of preference. All
+# of them must produce identical output for identical parameters.
+_KDF_BACKENDS = {}
+if argon2_core is not None:
+    _KDF_BACKENDS["argon2-cffi-ctx"] = _argon2_ctx
+if hash_secret_raw is not None:
+    _KDF_BACKENDS["argon2-cffi"] = _argon2_cffi
+
+# Name of the backend `derive_key` dispatches to, or None if none is installed.
+derive_key_backend = next(iter(_KDF_BACKENDS), None)
+
+
+def derive_key(password: str | bytes | bytearray, salt: bytes, time_cost: int = DEFAULT_TIME, memory_cost: int = DEFAULT_MEMORY, parallelism: int = DEFAULT_PARALLELISM, key_len: int = DEFAULT_KEY_LEN) -> bytes:
     """Derive a binary key from password and salt using Argon2id.
 
-    Requires `argon2-cffi` to be installed. Raises ImportError if not available.
+    A bytearray password can be wiped by the caller afterwards. Requires
+    `argon2-cffi` to be installed. Raises ImportError if not available.
     """
-    if hash_secret_raw is None:
+    if derive_key_backend is None:
         raise ImportError("argon2.low_level.hash_secret_raw is required (install argon2-cffi)")
     if isinstance(password, str):
         password = password.encode("utf-8")
-    return hash_secret_raw(password, salt, time_cost, memory_cost, parallelism, key_len, Type.ID)
+    return _KDF_BACKENDS[derive_key_backend](password, salt, time_cost, memory_cost, parallelism, key_len)
+
+
+def derive_keys_batch(passwords: Sequence[str], salts: Sequence[bytes], time_cost: int = DEFAULT_TIME, memory_cost: int = DEFAULT_MEMORY, parallelism: int = DEFAULT_PARALLELISM, key_len: int = DEFAULT_KEY_LEN, max_workers: Optional[int] = None) -> List[bytes]:
+    """Derive one key per (password, salt) pair on a thread pool.
+
+    argon2-cffi releases the GIL while hashing, so the derivations run on
+    separate cores. Each in-flight derivation holds `memory_cost` KiB, so
+    peak memory is up to `max_workers` (default: CPU count) times that.
+    Keys are returned in input order.
+    """
+    if len(passwords) != len(salts):
+        raise ValueError("passwords and salts must have the same length")
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+        return list(pool.map(
+            lambda pair: derive_key(pair[0], pair[1], time_cost, memory_cost, parallelism, key_len),
+            zip(passwords, salts),
+        ))
+
+
+# Argon2 memory_cost values (KiB) considered by calibrate_kdf, 64 MiB .. 512 MiB.
+# The first step is DEFAULT_MEMORY, which calibration never goes below.
+CALIBRATION_MEMORY_STEPS = tuple(DEFAULT_MEMORY << i for i in range(4))
+
+
+def _calibration_cache_path() -> Optional[str]:
+    if user_config_dir is None:
+        return None
+    return os.path.join(user_config_dir("passvault"), "kdf.json")
+
+
+def calibrate_kdf(target_ms: int = 250, time_cost: int = DEFAULT_TIME, parallelism: int = DEFAULT_PARALLELISM, cache_path: Optional[str] = None) -> dict:
+    """Pick the largest Argon2 memory_cost that derives within `target_ms`.
+
+    Probes CALIBRATION_MEMORY_STEPS above DEFAULT_MEMORY in increasing
+    order and stops at the first one over budget. Slow machines get
+    DEFAULT_MEMORY; calibration only ever strengthens the default. Results
+    are cached per CPU in `cache_path`, defaulting to kdf.json in the user
+    config dir. Returns a dict with the same keys as
+    KDFParamsSchema.to_dict().
+    """
+    if cache_path is None:
+        cache_path = _calibration_cache_path()
+    cache_key = f"{platform.processor() or platform.machine()}|{target_ms}|{time_cost}|{parallelism}"
+
+    cache = {}
+    if cache_path is not None and os.path.exists(cache_path):
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+        if cache_key in cache:
+            params = dict(cache[cache_key])
+            params["memory_cost"] = max(params["memory_cost"], DEFAULT_MEMORY)
+            return params
+
+    memory_cost = CALIBRATION_MEMORY_STEPS[0]
+    salt = bytes(16)
+    for step in CALIBRATION_MEMORY_STEPS[1:]:
+        start = time.perf_counter()
+        derive_key(b"passvault-calibration", salt, time_cost, step, parallelism)
+        if (time.perf_counter() - start) * 1000 > target_ms:
+            break
+        memory_cost = step
+
+    params = {"time_cost": time_cost, "memory_cost": memory_cost, "parallelism": parallelism}
+    if cache_path is not None:
+        cache[cache_key] = params
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path, "w", encoding="utf-8") as f:
+                json.dump(cache, f, indent=2)
+        except OSError:
+            pass
+    return params
+
+
+def key_check_tag(key: bytes) -> bytes:
+    """Return a short, non-secret tag that identifies a derived key.
+
+    Stored next to the vault so a wrong master password is rejected with one
+    HMAC instead of a full AES-GCM pass; comparing it reveals nothing the
+    Argon2id-protected ciphertext does not.
+    """
+    return hmac.digest(key, b"passvault-v1", "sha256")[:8]
+
+
+def wipe(buf: bytearray) -> None:
+    """Overwrite a mutable buffer with zeros in place."""
+    if buf:
+        ctypes.memset((ctypes.c_char * len(buf)).from_buffer(buf), 0, len(buf))
+
+
+# CPU feature flags (as named in /proc/cpuinfo) that OpenSSL needs for its
+# hardware AES-GCM path: AES rounds plus carry-less multiply for GHASH.
+_HW_AES_FLAGS = {
+    "x86_64": ({"aes", "pclmulqdq"}, "flags"),
+    "aarch64": ({"aes", "pmull"}, "Features"),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def hardware_aes_available() -> Optional[bool]:
+    """Report whether the CPU advertises hardware AES-GCM support.
+
+    Returns None when this cannot be determined (non-Linux, unknown
+    architecture). OpenSSL selects the accelerated implementation on its
+    own; this only lets callers tell whether they are on the slow path.
+    """
+    machine = platform.machine().lower()
+    machine = {"amd64": "x86_64", "arm64": "aarch64"}.get(machine, machine)
+    if machine not in _HW_AES_FLAGS:
+        return None
+    required, field = _HW_AES_FLAGS[machine]
+    try:
+        with open("/proc/cpuinfo", encoding="ascii", errors="replace") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name.strip() == field:
+                    return required <= set(value.split())
+    except OSError:
+        return None
+    return None
+
+
+@functools.lru_cache(maxsize=1)
+def _warn_if_software_aes() -> None:
+    if hardware_aes_available() is False:
+        logger.warning("CPU lacks AES/carry-less multiply instructions; AES-GCM will run in software")
+
+
+def new_cipher(key: bytes) -> "AESGCM":
+    """Return an AESGCM instance for `key`.
+
+    Building one runs the key schedule, so callers that encrypt or decrypt
+    many payloads under one key (e.g. a Vault) should keep the instance and
+    use `encrypt_with`/`decrypt_with`. Dropping it frees the expanded key.
+    OpenSSL picks the AES-NI/PCLMULQDQ implementation itself.
+    """
+    if AESGCM is None:
+        raise ImportError("cryptography AESGCM is required (install cryptography)")
+    _warn_if_software_aes()
+    return AESGCM(key)
 
 
 def encrypt(key: bytes, plaintext: bytes) -> Tuple[bytes, bytes]:
@@ -39,21 +252,80 @@ def encrypt(key: bytes, plaintext: bytes) -> Tuple[bytes, bytes]:
 
     Requires `cryptography` package.
     """
+    return encrypt_with(new_cipher(key), plaintext)
+
+
+def encrypt_with(cipher: "AESGCM", plaintext: bytes) -> Tuple[bytes, bytes]:
+    """Like `encrypt`, using an instance from `new_cipher`."""
+    nonce = rand_bytes(12)
+    ct = cipher.encrypt(nonce, plaintext, associated_data=None)
+    return nonce, ct
+
+
+def decrypt_with(cipher: "AESGCM", nonce: bytes, ciphertext: bytes) -> bytes:
+    """Decrypt with an instance from `new_cipher`. Raises DecryptionError on
+    auth failure."""
+    try:
+        return cipher.decrypt(nonce, ciphertext, associated_data=None)
+    except Exception as e:
+        raise DecryptionError("decryption failed") from e
+
+
+def encrypt_into(key: bytes, plaintext, out: bytearray) -> Tuple[bytes, int]:
+    """Encrypt `plaintext` into the caller's buffer `out` as body || tag.
+
+    Returns (nonce, bytes written); `out[:n]` is what `decrypt` expects.
+    The plaintext is processed in STREAM_THRESHOLD-sized chunks, so no
+    second full-size ciphertext object is allocated. `out` must hold at
+    least len(plaintext) + GCM_TAG_LEN bytes.
+    """
     if AESGCM is None:
         raise ImportError("cryptography AESGCM is required (install cryptography)")
-    aesgcm = AESGCM(key)
-    nonce = os.urandom(12)
-    ct = aesgcm.encrypt(nonce, plaintext, associated_data=None)
-    return nonce, ct
+    view = memoryview(plaintext).cast("B")
+    size = len(view)
+    if len(out) < size + GCM_TAG_LEN:
+        raise ValueError(f"output buffer too small: need {size + GCM_TAG_LEN} bytes, got {len(out)}")
+    nonce = rand_bytes(12)
+    encryptor = Cipher(algorithms.AES(bytes(key)), modes.GCM(nonce)).encryptor()
+    out_view = memoryview(out)
+    written = 0
+    for start in range(0, size, STREAM_THRESHOLD):
+        chunk = view[start:start + STREAM_THRESHOLD]
+        # update_into needs block_size - 1 bytes of slack; the tag space covers it.
+        written += encryptor.update_into(chunk, out_view[written:written + len(chunk) + 15])
+    encryptor.finalize()
+    out_view[written:written + GCM_TAG_LEN] = encryptor.tag
+    return nonce, written + GCM_TAG_LEN
 
 
-def decrypt(key: bytes, nonce: bytes, ciphertext: bytes) -> bytes:
-    """Decrypt AES-GCM ciphertext. Raises DecryptionError on auth failure."""
+def decrypt(key: bytes, nonce: bytes, ciphertext: bytes) -> bytes | bytearray:
+    """Decrypt AES-GCM ciphertext. Raises DecryptionError on auth failure.
+
+    Returns `bytes`, except for ciphertexts of STREAM_THRESHOLD (64 KiB) or
+    more: those are decrypted into a preallocated `bytearray`, returned
+    as-is to avoid a second full-size copy of the plaintext. Callers that
+    need an immutable or hashable value must convert it themselves.
+    """
     if AESGCM is None:
         raise ImportError("cryptography AESGCM is required (install cryptography)")
-    aesgcm = AESGCM(key)
+    if len(ciphertext) >= STREAM_THRESHOLD:
+        return _decrypt_into_buffer(key, nonce, ciphertext)
+    return decrypt_with(new_cipher(key), nonce, ciphertext)
+
+
+def _decrypt_into_buffer(key: bytes, nonce: bytes, ciphertext: bytes) -> bytearray:
+    """Stream-decrypt `ciphertext` (body || tag) into a fresh bytearray."""
+    view = memoryview(ciphertext)
+    size = len(view) - GCM_TAG_LEN
+    # update_into requires block_size - 1 bytes of slack past the data.
+    buf = bytearray(size + 15)
     try:
-        pt = aesgcm.decrypt(nonce, ciphertext, associated_data=None)
+        decryptor = Cipher(algorithms.AES(key), modes.GCM(nonce, bytes(view[size:]))).decryptor()
+        written = decryptor.update_into(view[:size], buf)
+        decryptor.finalize()
     except Exception as e:
+        # Never hand back (or leave behind) unauthenticated plaintext.
+        wipe(buf)
         raise DecryptionError("decryption failed") from e
-    return pt
+    del buf[written:]
+    return buf
@@ -0,0 +1,44 @@
+"""Pooled random bytes for short-lived values such as AES-GCM nonces."""
+import os
+import threading
+
+
+class _RandomPool:
+    """Hand out random bytes from a buffer refilled by one `os.urandom` call.
+
+    Drawing a 12-byte nonce per encrypt would cost one getrandom syscall
+    each; the pool amortizes that over `size` bytes. The buffer is dropped
+    in forked children so parent and child never share pending bytes.
+    """
+
+    def __init__(self, size: int = 4096):
+        self._size = size
+        self._reset()
+
+    def _reset(self) -> None:
+        self._lock = threading.Lock()
+        self._buf = bytearray()
+        self._pos = 0
+
+    def take(self, n: int) -> bytes:
+        with self._lock:
+            if self._pos + n > len(self._buf):
+                self._buf = bytearray(os.urandom(max(self._size, n)))
+                self._pos = 0
+            out = bytes(memoryview(self._buf)[self._pos:self._pos + n])
+            self._pos += n
+            return out
+
+
+_pool = _RandomPool()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_pool._reset)
+
+
+def rand_bytes(n: int) -> bytes:
+    """Return `n` random bytes from the process-wide pool.
+
+    Meant for nonces; long-term secrets such as vault salts should still
+    come straight from `os.urandom`.
+    """
+    return _pool.take(n)
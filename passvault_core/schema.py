@@ -1,96 +1,131 @@
 import json
-from pydantic import BaseModel
+import binascii
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+from passvault_core.crypto import DEFAULT_TIME, DEFAULT_MEMORY, DEFAULT_PARALLELISM
+
+
+def _json_default(obj):
+    """JSON fallback for types the encoder does not know; bytes become base64."""
+    if isinstance(obj, bytes):
+        return binascii.b2a_base64(obj, newline=False).decode("ascii")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _json_dumps(obj) -> bytes:
+    """Serialize `obj` to compact JSON bytes, using orjson when available.
+
+    `bytes` values are base64-encoded once, directly by the encoder.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default)
+    return json.dumps(obj, separators=(",", ":"), default=_json_default).encode("utf-8")
+
+
+def _json_loads(data):
+    """Parse JSON from str, bytes or (with orjson) a memoryview."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
 class CredentialSchema(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     username: str
     password: str
 
     def to_dict(self) -> dict:
-        return {
-            "username": self.username,
-            "password": self.password,
-        }
+        return self.model_dump()
     
     def to_str(self) -> str:
-        return json.dumps(self.to_dict())
+        return self.model_dump_json()
     
     @classmethod
     def from_str(cls, data: str):
-        """Create a CredentialSchema from a JSON string."""
-        dict_data = json.loads(data)
-        return cls(**dict_data)
+        """Create a CredentialSchema from a JSON string (or UTF-8 bytes).
+
+        Uses orjson when available; its JSONDecodeError subclasses the
+        stdlib one, so callers see the same exception either way.
+        """
+        return cls.model_validate(_json_loads(data))
+
+    def to_bytes(self) -> bytes:
+        """Serialize to UTF-8 JSON bytes, the plaintext stored in a pointer."""
+        return _json_dumps(self.to_dict())
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        """Create a CredentialSchema from `to_bytes` output."""
+        return cls.model_validate(_json_loads(data))
 
 class KDFParamsSchema(BaseModel):
-    time_cost: int = 2
-    memory_cost: int = 65536
-    parallelism: int = 1
+    model_config = ConfigDict(frozen=True)
+
+    time_cost: int = DEFAULT_TIME
+    memory_cost: int = DEFAULT_MEMORY
+    # new vaults use up to 4 Argon2 lanes; stored vaults keep their own value
+    parallelism: int = DEFAULT_PARALLELISM
 
     def to_dict(self) -> dict:
-        return {
-            "time_cost": self.time_cost,
-            "memory_cost": self.memory_cost,
-            "parallelism": self.parallelism,
-        }
+        return self.model_dump()
 
 class PointerSchema(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     id: str
     vault_id: str
     nonce: bytes
 
     def to_dict(self) -> dict:
-        return {
-            "id": self.id,
-            "vault_id": self.vault_id,
-            "nonce": self.nonce,
-        }
+        return self.model_dump()
 
     @classmethod
     def from_dict(cls, data: dict):
-        """Create a PointerSchema from a plain dict.
-
-        This helper prefers the Pydantic v2 API (`model_validate`) when
-        available, falls back to v1 (`parse_obj`) and finally to direct
-        construction. It will raise the appropriate Pydantic
-        ValidationError on invalid input.
-        """
-        # Pydantic v2
-        if hasattr(cls, "model_validate"):
-            return cls.model_validate(data)
-        # Pydantic v1
-        if hasattr(cls, "parse_obj"):
-            return cls.parse_obj(data)
-        # Fallback
-        return cls(**data)
+        """Create a PointerSchema from a plain dict. Raises pydantic's
+        ValidationError on invalid input."""
+        return cls.model_validate(data)
 
 class VaultSchema(BaseModel):
+    # Mutable: Vault appends pointers and backfills pw_tag in place.
     id: str
     salt: bytes
     encrypted_pointers: List[Optional[PointerSchema]] = []
     kdf_params: KDFParamsSchema = KDFParamsSchema()
+    pw_tag: Optional[bytes] = None
 
     def to_dict(self) -> dict:
-        return {
-            "id": self.id,
-            "salt": self.salt,
-            "encrypted_pointers": [p.to_dict() if p else None for p in self.encrypted_pointers],
-            "kdf_params": self.kdf_params.to_dict(),
-        }
+        return self.model_dump()
     
     @classmethod
-    def from_dict(self, data: dict):
-        """Create a VaultSchema from a plain dict.
+    def from_dict(cls, data: dict):
+        """Create a VaultSchema from a plain dict. Raises pydantic's
+        ValidationError on invalid input."""
+        return cls.model_validate(data)
+
+    def to_json(self) -> bytes:
+        """Serialize the vault config to compact JSON bytes; `bytes` fields
+        are written as base64 strings."""
+        return _json_dumps(self.to_dict())
+
+    @classmethod
+    def from_json(cls, data):
+        """Create a VaultSchema from JSON written by `to_json`.
 
-        This helper prefers the Pydantic v2 API (`model_validate`) when
-        available, falls back to v1 (`parse_obj`) and finally to direct
-        construction. It will raise the appropriate Pydantic
-        ValidationError on invalid input.
+        Only the salt, the password check tag and the pointer nonces are
+        stored as base64.
         """
-        # Pydantic v2
-        if hasattr(self, "model_validate"):
-            return self.model_validate(data)
-        # Pydantic v1
-        if hasattr(self, "parse_obj"):
-            return self.parse_obj(data)
-        # Fallback
-        return self(**data)
\ No newline at end of file
+        vault_data = _json_loads(data)
+        vault_data["salt"] = binascii.a2b_base64(vault_data["salt"])
+        if vault_data.get("pw_tag") is not None:
+            vault_data["pw_tag"] = binascii.a2b_base64(vault_data["pw_tag"])
+        for pointer in vault_data.get("encrypted_pointers", []):
+            if pointer is not None:
+                pointer["nonce"] = binascii.a2b_base64(pointer["nonce"])
+        return cls.from_dict(vault_data)
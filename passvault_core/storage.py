@@ -1,114 +1,312 @@
 import os
-import json
-import base64
-import tempfile
-from passvault_core.crypto import derive_key, encrypt, decrypt
+import mmap
+import binascii
+import hmac
+import hashlib
+import itertools
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+try:
+    import keyring
+except ImportError:
+    keyring = None  # type: ignore
+
+from passvault_core.crypto import derive_key, calibrate_kdf, new_cipher, encrypt_with, decrypt_with, key_check_tag, wipe
+from passvault_core.errors import DecryptionError
 from passvault_core.schema import VaultSchema, KDFParamsSchema, PointerSchema, CredentialSchema
 
 
 def encode_string_to_base64_bytes(s: str) -> bytes:
     """Encode a string to base64 bytes."""
-    return base64.b64encode(s.encode("utf-8"))
+    return binascii.b2a_base64(s.encode("utf-8"), newline=False)
 
 
 def decode_base64_bytes_to_string(b: bytes) -> str:
     """Decode base64 bytes to a string."""
-    return base64.b64decode(b).decode("utf-8")
+    return binascii.a2b_base64(b).decode("utf-8")
+
+
+def _read_vault_file(path: str) -> VaultSchema:
+    """Load a vault config; with orjson, parse straight from a read-only mmap
+    so the file contents are not first copied into a Python bytes object."""
+    with open(path, "rb") as f:
+        if orjson is None or os.fstat(f.fileno()).st_size == 0:
+            return VaultSchema.from_json(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                return VaultSchema.from_json(view)
+            finally:
+                view.release()
+
+
+def _read_pointer_bytes(path: str) -> bytes:
+    """Read a whole (small) file with raw os.read calls, skipping the
+    buffered-reader layer; normally a single read of st_size bytes."""
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_CLOEXEC", 0))
+    try:
+        size = os.fstat(fd).st_size
+        data = os.read(fd, size)
+        if len(data) < size:
+            chunks = [data]
+            while chunk := os.read(fd, size - sum(map(len, chunks))):
+                chunks.append(chunk)
+            data = b"".join(chunks)
+        return data
+    finally:
+        os.close(fd)
+
+
+_KEYRING_SERVICE = "passvault"
+
+# suffix for atomic_write_bytes temp files; unique within a process
+_tmp_counter = itertools.count()
 
 
 class Vault:
 
     path = os.getenv("PASSVAULT", "data")
+    # (path, st_mtime_ns, names) from the last list_vaults scan
+    _list_cache: tuple[str, int, list[str]] | None = None
 
-    def __init__(self, id: str, TIME: int = None, MEMORY: int = None, PARALLELISM: int = None, load: bool = True):
+    def __init__(self, id: str, TIME: int = None, MEMORY: int = None, PARALLELISM: int = None, load: bool = True, calibrate: bool = False):
         vault_config: VaultSchema = VaultSchema(id=id, salt=os.urandom(32))
+        # (derived key, AESGCM instance) pairs, keyed by a salted BLAKE2b
+        # digest of the master password
+        self._key_cache: dict[bytes, tuple] = {}
+        # keyring entry written by unlock(use_keyring=True), removed by lock()
+        self._keyring_name: str | None = None
+        cfg_path = os.path.join(Vault.path, id, "vault_config.json")
+        exists = load and os.path.exists(cfg_path)
 
         if TIME is not None and MEMORY is not None and PARALLELISM is not None:
             vault_config.kdf_params = KDFParamsSchema(time_cost=TIME, memory_cost=MEMORY, parallelism=PARALLELISM)
+        elif calibrate and not exists:
+            # new vault: size Argon2 to this machine instead of the fixed default
+            vault_config.kdf_params = KDFParamsSchema(**calibrate_kdf())
         self.vault_config = vault_config
+        self._reindex()
 
         # auto-load existing vault config if requested and file exists
-        if load:
-            cfg_path = os.path.join(Vault.path, id, "vault_config.json")
-            if os.path.exists(cfg_path):
-                self.load(id)
+        if exists:
+            self.load(id)
 
     def load(self, id):
         path = os.path.join(Vault.path, id, "vault_config.json")
-        with open(path, "r", encoding="utf-8") as f:
-            vault_data = json.load(f)
-
-        def _decode_bytes(obj):
-            if isinstance(obj, dict):
-                out = {}
-                for k, v in obj.items():
-                    if k in ("salt", "nonce") and isinstance(v, str):
-                        out[k] = base64.b64decode(v.encode("ascii"))
-                    else:
-                        out[k] = _decode_bytes(v)
-                return out
-            if isinstance(obj, list):
-                return [_decode_bytes(x) for x in obj]
-            return obj
-
-        vault_data = _decode_bytes(vault_data)
-        self.vault_config = VaultSchema.from_dict(vault_data)
+        self.vault_config = _read_vault_file(path)
+        self._reindex()
+        self._wipe_keys()
+
+    def _reindex(self):
+        """Rebuild the pointer-id lookup table from the vault config."""
+        self._pointer_index: dict[str, PointerSchema] = {
+            p.id: p for p in self.vault_config.encrypted_pointers if p is not None
+        }
 
 
     def update_vault(self):
         path = os.path.join(Vault.path, self.vault_config.id, "vault_config.json")
+        Vault.atomic_write_bytes(path, self.vault_config.to_json())
+        # a new vault directory may land within the parent's mtime granularity
+        Vault._list_cache = None
+
+
+    def _cache_id(self, master_password) -> bytes:
+        pw = master_password.encode("utf-8") if isinstance(master_password, str) else master_password
+        return hashlib.blake2b(pw, key=self.vault_config.salt, digest_size=16).digest()
 
-        def _encode_bytes(obj):
-            if isinstance(obj, bytes):
-                return base64.b64encode(obj).decode("ascii")
-            if isinstance(obj, dict):
-                return {k: _encode_bytes(v) for k, v in obj.items()}
-            if isinstance(obj, list):
-                return [_encode_bytes(x) for x in obj]
-            return obj
+    def _get_key(self, master_password: str) -> tuple:
+        """Return (key, cipher) for the password, running Argon2id only on
+        the first call for it. The password itself is never stored.
 
-        plain = self.vault_config.to_dict()
-        serializable = _encode_bytes(plain)
-        json_bytes = json.dumps(serializable, indent=2).encode("utf-8")
-        Vault.atomic_write_bytes(path, json_bytes)
+        The key is the cached bytearray itself, not a copy, so `lock()` can
+        zeroize it; callers must not keep references past their call.
+        """
+        cache_id = self._cache_id(master_password)
+        entry = self._key_cache.get(cache_id)
+        if entry is None:
+            pw = master_password.encode("utf-8") if isinstance(master_password, str) else master_password
+            key = bytearray(derive_key(pw, self.vault_config.salt, **self.vault_config.kdf_params.to_dict()))
+            entry = self._key_cache[cache_id] = (key, new_cipher(key))
+        return entry
 
+    def _keyring_entry(self) -> str:
+        """Keyring username for this vault's cached key. It changes with the
+        salt or KDF parameters, so a stale key is never picked up."""
+        params = "{time_cost}:{memory_cost}:{parallelism}".format(**self.vault_config.kdf_params.to_dict())
+        fingerprint = hashlib.blake2b(self.vault_config.salt + params.encode("ascii"), digest_size=16).hexdigest()
+        return f"{self.vault_config.id}:{fingerprint}"
+
+    def unlock(self, master_password: str, *, use_keyring: bool = False):
+        """Derive and cache the vault key ahead of pointer access.
+
+        With `use_keyring=True` the key is also stored in the OS keyring
+        (requires `keyring`), so later processes skip Argon2id. This is
+        opt-in: access to the keyring entry then unlocks the vault on its
+        own, whatever password is supplied. Only the key is stored, never
+        anything derived cheaply from the password. `lock()` removes the
+        entry again.
+        """
+        if not use_keyring:
+            self._master_key(master_password)
+            return
+        if keyring is None:
+            raise ImportError("keyring is required for use_keyring=True (install keyring)")
+        entry = self._keyring_entry()
+        tag = self.vault_config.pw_tag
+        stored = keyring.get_password(_KEYRING_SERVICE, entry)
+        if stored is not None and tag is not None:
+            try:
+                key = bytearray(binascii.a2b_base64(stored))
+            except (binascii.Error, ValueError):
+                key = None  # corrupt entry: treat as a miss
+            if key is not None and hmac.compare_digest(tag, key_check_tag(key)):
+                cache_id = self._cache_id(master_password)
+                if cache_id in self._key_cache:
+                    wipe(key)
+                else:
+                    self._key_cache[cache_id] = (key, new_cipher(key))
+                self._keyring_name = entry
+                return
+            if key is not None:
+                wipe(key)
+        key, _ = self._master_key(master_password)
+        keyring.set_password(_KEYRING_SERVICE, entry, binascii.b2a_base64(key, newline=False).decode("ascii"))
+        self._keyring_name = entry
+
+    def _wipe_keys(self):
+        # Dropping the AESGCM instances frees OpenSSL's copy of each key.
+        for key, _ in self._key_cache.values():
+            wipe(key)
+        self._key_cache.clear()
+
+    def lock(self):
+        """Zeroize and forget every key derived for this vault, including
+        any copy `unlock` placed in the OS keyring."""
+        self._wipe_keys()
+        if self._keyring_name is not None:
+            try:
+                keyring.delete_password(_KEYRING_SERVICE, self._keyring_name)
+            except Exception:
+                pass  # already removed, or the keyring backend is gone
+            self._keyring_name = None
+
+    def _master_key(self, master_password: str) -> tuple:
+        """Return (key, cipher) as `_get_key` does, rejecting the key early
+        if it fails the stored check tag."""
+        key, cipher = self._get_key(master_password)
+        tag = self.vault_config.pw_tag
+        if tag is not None and not hmac.compare_digest(tag, key_check_tag(key)):
+            raise DecryptionError("wrong master password")
+        return key, cipher
 
     def updated_pointer(self, master_password: str, pointer_id: str, username: str, password: str):
         
-        if any([p.id for p in self.vault_config.encrypted_pointers if p.id == pointer_id]):
+        if pointer_id in self._pointer_index:
             raise ValueError(f"Pointer with id {pointer_id} already exists in vault {self.vault_config.id}")
         credentials = CredentialSchema(password=password, username=username)
-        master_hash_key = derive_key(password=master_password, salt=self.vault_config.salt, **self.vault_config.kdf_params.to_dict())
-        nonce, encrypted_data = encrypt(key=master_hash_key, plaintext=encode_string_to_base64_bytes(credentials.to_str()))
+        master_hash_key, cipher = self._master_key(master_password)
+        if self.vault_config.pw_tag is None and not self._pointer_index:
+            # the first credential fixes the vault's master password
+            self.vault_config.pw_tag = key_check_tag(master_hash_key)
+        nonce, encrypted_data = encrypt_with(cipher, credentials.to_bytes())
 
         Vault.atomic_write_bytes(os.path.join(Vault.path, self.vault_config.id, f"{pointer_id}.ptr"), encrypted_data)
         pointer = PointerSchema(id=pointer_id, vault_id=self.vault_config.id, nonce=nonce)
         self.vault_config.encrypted_pointers.append(pointer)
+        self._pointer_index[pointer_id] = pointer
     
     def get_pointer(self, master_password: str, pointer_id: str) -> CredentialSchema:
-        pointer = next((p for p in self.vault_config.encrypted_pointers if p.id == pointer_id), None)
+        pointer = self._pointer_index.get(pointer_id)
         if pointer is None:
             raise ValueError(f"Pointer with id {pointer_id} does not exist in vault {self.vault_config.id}")
-        with open(os.path.join(Vault.path, self.vault_config.id, f"{pointer_id}.ptr"), "rb") as f:
-            encrypted_data = f.read()
-        master_hash_key = derive_key(password=master_password, salt=self.vault_config.salt, **self.vault_config.kdf_params.to_dict())
-        decrypted_data = decrypt(key=master_hash_key, nonce=pointer.nonce, ciphertext=encrypted_data)
-        credentials_str = decode_base64_bytes_to_string(decrypted_data)
-        credentials = CredentialSchema.from_str(data=credentials_str)
+        master_hash_key, cipher = self._master_key(master_password)
+        encrypted_data = _read_pointer_bytes(os.path.join(Vault.path, self.vault_config.id, f"{pointer_id}.ptr"))
+        decrypted_data = decrypt_with(cipher, pointer.nonce, encrypted_data)
+        if self.vault_config.pw_tag is None:
+            # older vault: the key just authenticated, so record its tag
+            self.vault_config.pw_tag = key_check_tag(master_hash_key)
+        return Vault._parse_credential(decrypted_data)
+
+    def get_all_pointers(self, master_password: str) -> dict[str, CredentialSchema]:
+        """Decrypt every pointer in the vault with a single key derivation
+        and a single AESGCM instance."""
+        master_hash_key, cipher = self._master_key(master_password)
+        directory = os.path.join(Vault.path, self.vault_config.id)
+        credentials = dict.fromkeys(self._pointer_index)
+        for pointer_id, pointer in self._pointer_index.items():
+            encrypted_data = _read_pointer_bytes(os.path.join(directory, f"{pointer_id}.ptr"))
+            decrypted_data = decrypt_with(cipher, pointer.nonce, encrypted_data)
+            credentials[pointer_id] = Vault._parse_credential(decrypted_data)
+        if self.vault_config.pw_tag is None and credentials:
+            self.vault_config.pw_tag = key_check_tag(master_hash_key)
         return credentials
-    
+
+    @staticmethod
+    def _parse_credential(decrypted_data: bytes) -> CredentialSchema:
+        # Pointers written by older versions hold base64(JSON). A JSON object
+        # starts with "{", which is not in the base64 alphabet.
+        if decrypted_data[:1] != b"{":
+            return CredentialSchema.from_str(decode_base64_bytes_to_string(decrypted_data))
+        return CredentialSchema.from_bytes(decrypted_data)
+
 
     def list_pointers(self) -> list[str]:
-        return [p.id for p in self.vault_config.encrypted_pointers]
+        return list(self._pointer_index)
     
-    @staticmethod
-    def list_vaults() -> list[str]:
-        return os.listdir(Vault.path)
+    @classmethod
+    def list_vaults(cls) -> list[str]:
+        """Return the vault directory names under `Vault.path`.
+
+        The listing is cached and reused while the directory's mtime is
+        unchanged, so repeated calls cost a single stat.
+        """
+        mtime = os.stat(Vault.path).st_mtime_ns
+        cached = cls._list_cache
+        if cached is not None and cached[0] == Vault.path and cached[1] == mtime:
+            return list(cached[2])
+        with os.scandir(Vault.path) as it:
+            names = [e.name for e in it if not e.name.startswith(".") and e.is_dir()]
+        cls._list_cache = (Vault.path, mtime, names)
+        return list(names)
     
     @classmethod
-    def atomic_write_bytes(cls, path: str, data: bytes):
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as tf:
-            tf.write(data)
-            tmp = tf.name
-        os.replace(tmp, path)
\ No newline at end of file
+    def atomic_write_bytes(cls, path: str, data: bytes, sync: bool = False):
+        """Write `data` to `path` through a same-directory temp file and
+        rename it into place. The temp file is created exclusively with mode
+        0600, so no chmod is needed; a name left behind by an earlier process
+        with the same pid is skipped. With `sync=True` the data is fsynced
+        before the rename."""
+        flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_CLOEXEC", 0)
+        while True:
+            tmp = f"{path}.{os.getpid()}.{next(_tmp_counter)}.tmp"
+            # The directory almost always exists already; only create it when
+            # the temp file cannot be opened, saving a mkdir+stat per write.
+            try:
+                fd = os.open(tmp, flags, 0o600)
+            except FileNotFoundError:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                continue
+            except FileExistsError:
+                continue
+            break
+        try:
+            try:
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(fd, view):]
+                if sync:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except FileNotFoundError:
+                pass
+            raise
@@ -0,0 +1,58 @@
+"""Shared fixtures for passvault_core tests."""
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from passvault_core import clipboard, storage
+from passvault_core.clipboard import ClipboardManager
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "write_path: covers _write_to_clipboard with subprocess.Popen mocked")
+
+
+@pytest.fixture(scope="session")
+def shared_manager():
+    """One ClipboardManager for the whole test session."""
+    return ClipboardManager()
+
+
+@pytest.fixture
+def manager(shared_manager):
+    """Provide the shared ClipboardManager, reset after each test."""
+    yield shared_manager
+    shared_manager.reset_state()
+
+
+@pytest.fixture
+def mock_write(monkeypatch):
+    """Replace the system clipboard write with a MagicMock."""
+    mock = MagicMock(return_value=None)
+    monkeypatch.setattr(ClipboardManager, "_write_to_clipboard", mock)
+    return mock
+
+
+@pytest.fixture(scope="session")
+def pool():
+    """Thread pool shared by the concurrency tests."""
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        yield executor
+
+
+@pytest.fixture
+def fresh_singleton(monkeypatch):
+    """Start the test with no global ClipboardManager instance."""
+    monkeypatch.setattr(clipboard, "_clipboard_manager", None)
+
+
+@pytest.fixture
+def fake_keyring(monkeypatch):
+    """Replace the OS keyring with an in-memory one; returns its entries."""
+    entries = {}
+    monkeypatch.setattr(storage, "keyring", SimpleNamespace(
+        get_password=lambda service, name: entries.get((service, name)),
+        set_password=lambda service, name, value: entries.__setitem__((service, name), value),
+        delete_password=lambda service, name: entries.pop((service, name)),
+    ))
+    return entries
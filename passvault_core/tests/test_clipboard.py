@@ -9,9 +9,10 @@ Tests cover:
 """
 
 import pytest
-import threading
-from unittest.mock import patch, MagicMock
+from types import SimpleNamespace
+from unittest.mock import patch
 
+from passvault_core import clipboard
 from passvault_core.clipboard import (
     ClipboardManager,
     ClipboardError,
@@ -22,88 +23,72 @@ from passvault_core.clipboard import (
 # Note: Timeout-related tests have been removed as the module now uses
 # manual clearing only with subprocess timeout protection.
 
+_POPEN_PATCH = "passvault_core.clipboard.subprocess.Popen"
 
 
+def _copy_then_clear(manager, text):
+    """Copy `text`, clear it again and return whether it was managed in between."""
+    manager.copy(text)
+    was_managed = manager.is_managed()
+    manager.clear()
+    return was_managed
+
 
 class TestClipboardCopyAndClear:
     """Tests for copy and clear operations."""
 
-    @pytest.fixture
-    def manager(self):
-        """Provide a ClipboardManager instance."""
-        return ClipboardManager()
-
-    @patch("passvault_core.clipboard.ClipboardManager._write_to_clipboard")
     def test_copy_success(self, mock_write, manager):
         """Test successful copy operation."""
-        mock_write.return_value = None
         manager.copy("test_password")
         
         mock_write.assert_called_once_with("test_password")
         assert manager.is_managed() is True
 
-    @patch("passvault_core.clipboard.ClipboardManager._write_to_clipboard")
-    def test_copy_empty_string(self, mock_write, manager):
-        """Test that empty string copy raises ValueError."""
+    @pytest.mark.parametrize("bad", ["", None])
+    def test_copy_bad_input(self, mock_write, manager, bad):
+        """Test that empty or None copy raises ValueError."""
         with pytest.raises(ValueError, match="non-empty string"):
-            manager.copy("")
+            manager.copy(bad)
         
         mock_write.assert_not_called()
 
-    @patch("passvault_core.clipboard.ClipboardManager._write_to_clipboard")
-    def test_copy_none_raises_error(self, mock_write, manager):
-        """Test that None copy raises ValueError."""
-        with pytest.raises(ValueError, match="non-empty string"):
-            manager.copy(None)
-        
-        mock_write.assert_not_called()
-
-    @patch("passvault_core.clipboard.ClipboardManager._write_to_clipboard")
-    def test_copy_write_fails(self, mock_write, manager):
+    @pytest.mark.parametrize("op", ["copy", "clear"])
+    def test_write_fails(self, mock_write, manager, op):
         """Test that write failure raises ClipboardError."""
         mock_write.side_effect = Exception("Write failed")
         
         with pytest.raises(ClipboardError):
-            manager.copy("password")
+            if op == "copy":
+                manager.copy("password")
+            else:
+                manager.clear()
         
         assert manager.is_managed() is False
 
-    @patch("passvault_core.clipboard.ClipboardManager._write_to_clipboard")
     def test_clear_success(self, mock_write, manager):
         """Test successful clear operation."""
-        mock_write.return_value = None
-        manager.copy("password")
-        assert manager.is_managed() is True
-        
-        manager.clear()
+        assert _copy_then_clear(manager, "password") is True
         
         # Should be called twice: once for copy, once for clear
         assert mock_write.call_count == 2
         mock_write.assert_called_with("")
         assert manager.is_managed() is False
 
-    @patch("passvault_core.clipboard.ClipboardManager._write_to_clipboard")
-    def test_clear_write_fails(self, mock_write, manager):
-        """Test that clear failure raises ClipboardError."""
-        mock_write.side_effect = Exception("Clear failed")
+    def test_reset_state(self, mock_write, manager):
+        """Test that reset_state forgets managed content without writing."""
+        manager.copy("password")
         
-        with pytest.raises(ClipboardError):
-            manager.clear()
+        manager.reset_state()
+        
+        mock_write.assert_called_once_with("password")
+        assert manager.is_managed() is False
 
 
 class TestContextManager:
     """Tests for context manager functionality."""
 
-    @pytest.fixture
-    def manager(self):
-        """Provide a ClipboardManager instance."""
-        return ClipboardManager()
-
-    @patch("passvault_core.clipboard.ClipboardManager._write_to_clipboard")
     def test_temporary_copy_context(self, mock_write, manager):
         """Test temporary_copy context manager."""
-        mock_write.return_value = None
-        
         with manager.temporary_copy("secret"):
             assert manager.is_managed() is True
             mock_write.assert_called_with("secret")
@@ -111,11 +96,8 @@ class TestContextManager:
         # After context, clipboard should be cleared
         assert manager.is_managed() is False
 
-    @patch("passvault_core.clipboard.ClipboardManager._write_to_clipboard")
     def test_temporary_copy_clears_on_exception(self, mock_write, manager):
         """Test that temporary_copy clears clipboard even on exception."""
-        mock_write.return_value = None
-        
         try:
             with manager.temporary_copy("secret"):
                 raise ValueError("Test error")
@@ -126,14 +108,12 @@ class TestContextManager:
         assert manager.is_managed() is False
 
 
+@pytest.mark.usefixtures("fresh_singleton")
 class TestGlobalManager:
     """Tests for global clipboard manager."""
 
-    @patch("passvault_core.clipboard.ClipboardManager._write_to_clipboard")
     def test_get_clipboard_manager_singleton(self, mock_write):
         """Test that get_clipboard_manager returns singleton."""
-        mock_write.return_value = None
-        
         manager1 = get_clipboard_manager()
         manager2 = get_clipboard_manager()
         
@@ -143,227 +123,39 @@ class TestGlobalManager:
 class TestThreadSafety:
     """Tests for thread safety."""
 
-    @pytest.fixture
-    def manager(self):
-        """Provide a ClipboardManager instance."""
-        return ClipboardManager()
-
-    @patch("passvault_core.clipboard.ClipboardManager._write_to_clipboard")
-    def test_concurrent_copy_operations(self, mock_write, manager):
+    def test_concurrent_copy_operations(self, mock_write, manager, pool):
         """Test that concurrent operations are thread-safe."""
-        mock_write.return_value = None
-        errors = []
-        
-        def copy_operation(text):
-            try:
-                manager.copy(text)
-            except Exception as e:
-                errors.append(e)
-        
-        threads = [
-            threading.Thread(target=copy_operation, args=(f"password{i}",))
-            for i in range(5)
-        ]
-        
-        for t in threads:
-            t.start()
-        for t in threads:
-            t.join()
+        futures = [pool.submit(manager.copy, f"password{i}") for i in range(5)]
+        errors = [f.exception() for f in futures if f.exception() is not None]
         
         assert len(errors) == 0
+        assert mock_write.call_count == 5
 
 
 class TestErrorHandling:
     """Tests for error handling."""
 
-    @pytest.fixture
-    def manager(self):
-        """Provide a ClipboardManager instance."""
-        return ClipboardManager()
-
-    @patch("passvault_core.clipboard.subprocess.Popen")
-    def test_xclip_not_found(self, mock_popen, manager):
-        """Test handling of missing xclip."""
-        mock_popen.side_effect = FileNotFoundError("xclip not found")
+    def test_backend_not_found(self):
+        """Test that a missing clipboard tool surfaces as ClipboardError."""
+        def backend(text):
+            raise FileNotFoundError("xclip not found")
+        manager = ClipboardManager(backend=backend)
         
         with pytest.raises(ClipboardError, match="xclip not found"):
             manager.copy("password")
+        assert manager.is_managed() is False
 
-    @patch("passvault_core.clipboard.subprocess.Popen")
-    def test_xclip_command_fails(self, mock_popen, manager):
-        """Test handling of xclip command failure."""
-        mock_process = MagicMock()
-        mock_process.returncode = 1
-        mock_process.communicate.return_value = (b"", b"Error message")
-        mock_popen.return_value = mock_process
+    def test_backend_command_fails(self):
+        """Test that a failing clipboard tool surfaces as ClipboardError."""
+        def backend(text):
+            raise ClipboardError("xclip failed: Error message")
+        manager = ClipboardManager(backend=backend)
         
         with pytest.raises(ClipboardError, match="xclip failed"):
             manager.copy("password")
 
-
-
-
-
-
-
-
-class TestClipboardCopyAndClear:
-    """Tests for copy and clear operations."""
-
-    @pytest.fixture
-    def manager(self):
-        """Provide a ClipboardManager instance."""
-        return ClipboardManager()
-
-    @patch("passvault_core.clipboard.ClipboardManager._write_to_clipboard")
-    def test_copy_success(self, mock_write, manager):
-        """Test successful copy operation."""
-        mock_write.return_value = None
-        manager.copy("test_password")
-        
-        mock_write.assert_called_once_with("test_password")
-        assert manager.is_managed() is True
-
-    @patch("passvault_core.clipboard.ClipboardManager._write_to_clipboard")
-    def test_copy_empty_string(self, mock_write, manager):
-        """Test that empty string copy raises ValueError."""
-        with pytest.raises(ValueError, match="non-empty string"):
-            manager.copy("")
-        
-        mock_write.assert_not_called()
-
-    @patch("passvault_core.clipboard.ClipboardManager._write_to_clipboard")
-    def test_copy_none_raises_error(self, mock_write, manager):
-        """Test that None copy raises ValueError."""
-        with pytest.raises(ValueError, match="non-empty string"):
-            manager.copy(None)
-        
-        mock_write.assert_not_called()
-
-    @patch("passvault_core.clipboard.ClipboardManager._write_to_clipboard")
-    def test_copy_write_fails(self, mock_write, manager):
-        """Test that write failure raises ClipboardError."""
-        mock_write.side_effect = Exception("Write failed")
-        
-        with pytest.raises(ClipboardError):
-            manager.copy("password")
-        
-        assert manager.is_managed() is False
-
-    @patch("passvault_core.clipboard.ClipboardManager._write_to_clipboard")
-    def test_clear_success(self, mock_write, manager):
-        """Test successful clear operation."""
-        mock_write.return_value = None
-        manager.copy("password")
-        assert manager.is_managed() is True
-        
-        manager.clear()
-        
-        # Should be called twice: once for copy, once for clear
-        assert mock_write.call_count == 2
-        mock_write.assert_called_with("")
-        assert manager.is_managed() is False
-
-    @patch("passvault_core.clipboard.ClipboardManager._write_to_clipboard")
-    def test_clear_write_fails(self, mock_write, manager):
-        """Test that clear failure raises ClipboardError."""
-        mock_write.side_effect = Exception("Clear failed")
-        
-        with pytest.raises(ClipboardError):
-            manager.clear()
-
-
-class TestContextManager:
-    """Tests for context manager functionality."""
-
-    @pytest.fixture
-    def manager(self):
-        """Provide a ClipboardManager instance."""
-        return ClipboardManager()
-
-    @patch("passvault_core.clipboard.ClipboardManager._write_to_clipboard")
-    def test_temporary_copy_context(self, mock_write, manager):
-        """Test temporary_copy context manager."""
-        mock_write.return_value = None
-        
-        with manager.temporary_copy("secret"):
-            assert manager.is_managed() is True
-            mock_write.assert_called_with("secret")
-        
-        # After context, clipboard should be cleared
-        assert manager.is_managed() is False
-
-    @patch("passvault_core.clipboard.ClipboardManager._write_to_clipboard")
-    def test_temporary_copy_clears_on_exception(self, mock_write, manager):
-        """Test that temporary_copy clears clipboard even on exception."""
-        mock_write.return_value = None
-        
-        try:
-            with manager.temporary_copy("secret"):
-                raise ValueError("Test error")
-        except ValueError:
-            pass
-        
-        # Clipboard should still be cleared
-        assert manager.is_managed() is False
-
-
-class TestGlobalManager:
-    """Tests for global clipboard manager."""
-
-    @patch("passvault_core.clipboard.ClipboardManager._write_to_clipboard")
-    def test_get_clipboard_manager_singleton(self, mock_write):
-        """Test that get_clipboard_manager returns singleton."""
-        mock_write.return_value = None
-        
-        manager1 = get_clipboard_manager()
-        manager2 = get_clipboard_manager()
-        
-        assert manager1 is manager2
-
-
-class TestThreadSafety:
-    """Tests for thread safety."""
-
-    @pytest.fixture
-    def manager(self):
-        """Provide a ClipboardManager instance."""
-        return ClipboardManager()
-
-    @patch("passvault_core.clipboard.ClipboardManager._write_to_clipboard")
-    def test_concurrent_copy_operations(self, mock_write, manager):
-        """Test that concurrent operations are thread-safe."""
-        mock_write.return_value = None
-        errors = []
-        
-        def copy_operation(text):
-            try:
-                manager.copy(text)
-            except Exception as e:
-                errors.append(e)
-        
-        threads = [
-            threading.Thread(target=copy_operation, args=(f"password{i}",))
-            for i in range(5)
-        ]
-        
-        for t in threads:
-            t.start()
-        for t in threads:
-            t.join()
-        
-        assert len(errors) == 0
-
-
-class TestErrorHandling:
-    """Tests for error handling."""
-
-    @pytest.fixture
-    def manager(self):
-        """Provide a ClipboardManager instance."""
-        return ClipboardManager()
-
-    @patch("passvault_core.clipboard.subprocess.Popen")
+    @pytest.mark.write_path
+    @patch(_POPEN_PATCH)
     def test_xclip_not_found(self, mock_popen, manager):
         """Test handling of missing xclip."""
         mock_popen.side_effect = FileNotFoundError("xclip not found")
@@ -371,13 +163,29 @@ class TestErrorHandling:
         with pytest.raises(ClipboardError, match="xclip not found"):
             manager.copy("password")
 
-    @patch("passvault_core.clipboard.subprocess.Popen")
+    @pytest.mark.write_path
+    @patch(_POPEN_PATCH)
     def test_xclip_command_fails(self, mock_popen, manager):
         """Test handling of xclip command failure."""
-        mock_process = MagicMock()
-        mock_process.returncode = 1
-        mock_process.communicate.return_value = (b"", b"Error message")
-        mock_popen.return_value = mock_process
+        mock_popen.return_value = SimpleNamespace(
+            returncode=1,
+            communicate=lambda **kwargs: (b"", b"Error message"),
+        )
         
         with pytest.raises(ClipboardError, match="xclip failed"):
             manager.copy("password")
+
+    @pytest.mark.write_path
+    @patch(_POPEN_PATCH)
+    def test_xclip_spawn_uses_absolute_path(self, mock_popen, manager, monkeypatch):
+        """Test that xclip is spawned by its resolved absolute path."""
+        monkeypatch.setattr(clipboard, "_xclip_executable", "/usr/bin/xclip")
+        mock_popen.return_value = SimpleNamespace(
+            returncode=0,
+            communicate=lambda **kwargs: (b"", b""),
+        )
+        
+        manager.copy("password")
+        
+        args, _ = mock_popen.call_args
+        assert args[0][0] == "/usr/bin/xclip"
@@ -1,4 +1,5 @@
 """Tests for passvault_core.crypto module."""
+import json
 import os
 import pytest
 from passvault_core.crypto import (
@@ -10,6 +11,7 @@ from passvault_core.crypto import (
     DEFAULT_PARALLELISM,
     DEFAULT_KEY_LEN,
 )
+from passvault_core import crypto
 from passvault_core.errors import DecryptionError
 
 
@@ -75,6 +77,52 @@ class TestDeriveKey:
         key = derive_key(password, salt)
         assert isinstance(key, bytes)
 
+    def test_derive_key_backend(self):
+        """Test that the selected KDF backend is reported."""
+        assert crypto.derive_key_backend == "argon2-cffi-ctx"
+        assert crypto.derive_key_backend in crypto._KDF_BACKENDS
+
+    def test_kdf_backends_agree(self):
+        """Test that the argon2_ctx backend matches plain argon2-cffi."""
+        salt = os.urandom(16)
+        for parallelism in (1, 2):
+            keys = {fn(b"password", salt, 1, 8192, parallelism, 32) for fn in crypto._KDF_BACKENDS.values()}
+            assert len(keys) == 1
+
+    def test_derive_keys_batch(self):
+        """Test batched derivation matches one-by-one derivation in order."""
+        passwords = ["password1", "password2", "password3"]
+        salts = [os.urandom(16) for _ in passwords]
+        keys = crypto.derive_keys_batch(passwords, salts, memory_cost=8192)
+        assert keys == [derive_key(p, s, memory_cost=8192) for p, s in zip(passwords, salts)]
+
+    def test_derive_keys_batch_length_mismatch(self):
+        """Test batched derivation rejects mismatched inputs."""
+        with pytest.raises(ValueError):
+            crypto.derive_keys_batch(["password1"], [])
+
+    def test_calibrate_kdf_caches_result(self, tmp_path, monkeypatch):
+        """Test KDF calibration picks a valid step and reuses the cached result."""
+        cache_path = str(tmp_path / "kdf.json")
+        params = crypto.calibrate_kdf(target_ms=0, time_cost=1, parallelism=1, cache_path=cache_path)
+        assert params == {"time_cost": 1, "memory_cost": crypto.DEFAULT_MEMORY, "parallelism": 1}
+        assert os.path.isfile(cache_path)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("derive_key should not run on a cache hit")
+        monkeypatch.setattr(crypto, "derive_key", fail)
+        assert crypto.calibrate_kdf(target_ms=0, time_cost=1, parallelism=1, cache_path=cache_path) == params
+
+    def test_calibrate_kdf_never_below_default(self, tmp_path):
+        """Test a stale cached memory_cost below the default is raised to it."""
+        cache_path = tmp_path / "kdf.json"
+        params = crypto.calibrate_kdf(target_ms=0, time_cost=1, parallelism=1, cache_path=str(cache_path))
+        cache = json.loads(cache_path.read_text())
+        for entry in cache.values():
+            entry["memory_cost"] = 8192
+        cache_path.write_text(json.dumps(cache))
+        assert crypto.calibrate_kdf(target_ms=0, time_cost=1, parallelism=1, cache_path=str(cache_path)) == params
+
 
 class TestEncrypt:
     """Test encryption using AES-GCM."""
@@ -105,6 +153,26 @@ class TestEncrypt:
         assert isinstance(nonce, bytes)
         assert isinstance(ciphertext, bytes)
 
+    def test_encrypt_with_reused_cipher(self):
+        """Test that one cipher instance encrypts and decrypts many payloads."""
+        key = os.urandom(32)
+        cipher = crypto.new_cipher(key)
+        for plaintext in (b"", b"a", b"payload" * 100):
+            nonce, ciphertext = crypto.encrypt_with(cipher, plaintext)
+            assert crypto.decrypt_with(cipher, nonce, ciphertext) == plaintext
+            assert decrypt(key, nonce, ciphertext) == plaintext
+        with pytest.raises(DecryptionError):
+            crypto.decrypt_with(crypto.new_cipher(os.urandom(32)), nonce, ciphertext)
+
+    def test_hardware_aes_detection(self, monkeypatch):
+        """Detection reads the CPU flags once and reports None off Linux."""
+        crypto.hardware_aes_available.cache_clear()
+        assert crypto.hardware_aes_available() in (True, False, None)
+        crypto.hardware_aes_available.cache_clear()
+        monkeypatch.setattr(crypto.platform, "machine", lambda: "sparc64")
+        assert crypto.hardware_aes_available() is None
+        crypto.hardware_aes_available.cache_clear()
+
     def test_encrypt_different_nonces(self):
         """Test that encrypt produces different nonces each call."""
         key = os.urandom(32)
@@ -113,6 +181,26 @@ class TestEncrypt:
         nonce2, _ = encrypt(key, plaintext)
         assert nonce1 != nonce2
 
+    def test_encrypt_nonces_unique_across_pool_refills(self):
+        """Test that pooled nonces stay unique when the pool is refilled."""
+        key = os.urandom(32)
+        nonces = {encrypt(key, b"test")[0] for _ in range(1000)}
+        assert len(nonces) == 1000
+
+    def test_encrypt_into_buffer(self):
+        """Test chunked encryption into a caller-provided buffer."""
+        key = os.urandom(32)
+        plaintext = os.urandom(1024 * 1024 + 7)
+        out = bytearray(len(plaintext) + 16)
+        nonce, n = crypto.encrypt_into(key, plaintext, out)
+        assert n == len(out)
+        assert decrypt(key, nonce, bytes(out[:n])) == plaintext
+
+    def test_encrypt_into_buffer_too_small(self):
+        """Test that a buffer without room for the tag is rejected."""
+        with pytest.raises(ValueError):
+            crypto.encrypt_into(os.urandom(32), b"data", bytearray(4))
+
 
 class TestDecrypt:
     """Test decryption using AES-GCM."""
@@ -124,6 +212,7 @@ class TestDecrypt:
         nonce, ciphertext = encrypt(key, plaintext)
         decrypted = decrypt(key, nonce, ciphertext)
         assert decrypted == plaintext
+        assert isinstance(decrypted, bytes)
 
     def test_decrypt_empty_plaintext(self):
         """Test decrypt of empty plaintext."""
@@ -140,6 +229,16 @@ class TestDecrypt:
         nonce, ciphertext = encrypt(key, plaintext)
         decrypted = decrypt(key, nonce, ciphertext)
         assert decrypted == plaintext
+        assert isinstance(decrypted, bytearray)
+
+    def test_decrypt_large_corrupted_ciphertext(self):
+        """Test that the streaming decrypt path still authenticates."""
+        key = os.urandom(32)
+        plaintext = b"x" * (1024 * 1024)  # 1 MB
+        nonce, ciphertext = encrypt(key, plaintext)
+        corrupted = ciphertext[:-1] + bytes([ciphertext[-1] ^ 1])
+        with pytest.raises(DecryptionError):
+            decrypt(key, nonce, corrupted)
 
     def test_decrypt_wrong_key(self):
         """Test decrypt with wrong key raises DecryptionError."""
@@ -0,0 +1,22 @@
+"""Tests for passvault_core.rand module."""
+from passvault_core.rand import rand_bytes, _RandomPool
+
+
+class TestRandBytes:
+    """Test the pooled random byte source."""
+
+    def test_rand_bytes_length(self):
+        """Test that the requested number of bytes is returned."""
+        assert len(rand_bytes(12)) == 12
+        assert len(rand_bytes(0)) == 0
+
+    def test_pool_refills_without_repeats(self):
+        """Test that draws across several refills never repeat."""
+        pool = _RandomPool(size=64)
+        draws = {pool.take(12) for _ in range(100)}
+        assert len(draws) == 100
+
+    def test_request_larger_than_pool(self):
+        """Test that a draw bigger than the pool size is still served."""
+        pool = _RandomPool(size=16)
+        assert len(pool.take(100)) == 100
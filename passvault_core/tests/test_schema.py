@@ -7,6 +7,7 @@ from passvault_core.schema import (
     PointerSchema,
     VaultSchema,
 )
+from passvault_core.crypto import DEFAULT_PARALLELISM
 
 
 class TestCredentialSchema:
@@ -46,6 +47,14 @@ class TestCredentialSchema:
         with pytest.raises(json.JSONDecodeError):
             CredentialSchema.from_str("invalid json")
 
+    def test_credential_bytes_roundtrip(self):
+        """Test to_bytes/from_bytes with non-ASCII values."""
+        original = CredentialSchema(username="usér", password="pässwörd\"{}")
+        data = original.to_bytes()
+        assert isinstance(data, bytes)
+        assert data[:1] == b"{"
+        assert CredentialSchema.from_bytes(data) == original
+
     def test_credential_from_str_missing_field(self):
         """Test credential from_str with missing required field."""
         with pytest.raises(Exception):  # Pydantic validation error
@@ -60,7 +69,7 @@ class TestKDFParamsSchema:
         params = KDFParamsSchema()
         assert params.time_cost == 2
         assert params.memory_cost == 65536
-        assert params.parallelism == 1
+        assert params.parallelism == DEFAULT_PARALLELISM
 
     def test_create_kdf_params_custom(self):
         """Test creating KDF params with custom values."""
@@ -173,3 +182,10 @@ class TestVaultSchema:
         assert vault.id == "vault1"
         assert len(vault.encrypted_pointers) == 2
         assert vault.encrypted_pointers[0] is None
+
+    def test_vault_json_roundtrip(self):
+        """Test that to_json/from_json preserve the bytes fields."""
+        ptr = PointerSchema(id="ptr1", vault_id="vault1", nonce=b"\x00\xffnonce")
+        vault = VaultSchema(id="vault1", salt=b"\x01salt", encrypted_pointers=[ptr, None], pw_tag=b"tag")
+        restored = VaultSchema.from_json(vault.to_json())
+        assert restored == vault
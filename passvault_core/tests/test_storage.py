@@ -1,25 +1,51 @@
 """Tests for passvault_core.storage module."""
 import os
 import json
-import tempfile
 import shutil
+import binascii
+import itertools
 import pytest
-from passvault_core.storage import Vault
+from passvault_core import schema, storage
+from passvault_core.storage import Vault, encode_string_to_base64_bytes
+from passvault_core.crypto import derive_key, encrypt
 from passvault_core.schema import CredentialSchema, VaultSchema, PointerSchema
+from passvault_core.errors import DecryptionError
+
+
+@pytest.fixture(scope="session")
+def vault_root(tmp_path_factory):
+    """One vault directory shared by the whole session."""
+    return str(tmp_path_factory.mktemp("vaults"))
+
+
+@pytest.fixture
+def derive_calls(monkeypatch):
+    """Record each storage.derive_key call; the derivation still runs."""
+    calls = []
+    def counting_derive_key(*args, **kwargs):
+        calls.append(args)
+        return derive_key(*args, **kwargs)
+    monkeypatch.setattr(storage, "derive_key", counting_derive_key)
+    return calls
 
 
 class TestVault:
     """Test Vault storage class."""
 
     @pytest.fixture
-    def temp_vault_dir(self):
-        """Create a temporary directory for vault tests."""
-        temp_dir = tempfile.mkdtemp()
+    def temp_vault_dir(self, vault_root):
+        """Point Vault.path at the shared vault root and empty it afterwards."""
         original_path = Vault.path
-        Vault.path = temp_dir
-        yield temp_dir
+        Vault.path = vault_root
+        yield vault_root
         Vault.path = original_path
-        shutil.rmtree(temp_dir, ignore_errors=True)
+        Vault._list_cache = None
+        with os.scandir(vault_root) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)
+                else:
+                    os.unlink(entry.path)
 
     def test_create_new_vault(self, temp_vault_dir):
         """Test creating a new vault."""
@@ -67,6 +93,17 @@ class TestVault:
         assert vault.vault_config.id == "nonexistent"
         assert isinstance(vault.vault_config.salt, bytes)
 
+    def test_vault_load_without_orjson(self, temp_vault_dir, monkeypatch):
+        """Test that the stdlib json fallback reads and writes the same config."""
+        vault1 = Vault("test_vault1", load=False)
+        vault1.update_vault()
+
+        monkeypatch.setattr(storage, "orjson", None)
+        monkeypatch.setattr(schema, "orjson", None)
+        vault2 = Vault("test_vault1", load=True)
+        assert vault2.vault_config.salt == vault1.vault_config.salt
+        vault2.update_vault()
+
     def test_add_pointer(self, temp_vault_dir):
         """Test adding a pointer to vault."""
         vault = Vault("test_vault1", load=False)
@@ -103,6 +140,47 @@ class TestVault:
         assert credentials.username == "user1"
         assert credentials.password == "pass1"
 
+    def test_get_pointer_after_load(self, temp_vault_dir):
+        """Test that pointers are found by id after reloading the vault."""
+        vault1 = Vault("test_vault1", load=False)
+        master_password = "test_password"
+        vault1.updated_pointer(master_password, "ptr1", "user1", "pass1")
+        vault1.update_vault()
+
+        vault2 = Vault("test_vault1", load=True)
+        with pytest.raises(ValueError):
+            vault2.updated_pointer(master_password, "ptr1", "user2", "pass2")
+        assert vault2.get_pointer(master_password, "ptr1").username == "user1"
+
+    def test_get_pointer_legacy_base64_payload(self, temp_vault_dir):
+        """Test that pointers stored as base64(JSON) by older versions still decrypt."""
+        vault = Vault("test_vault1", load=False)
+        master_password = "test_password"
+        vault.updated_pointer(master_password, "ptr1", "user1", "pass1")
+
+        key = derive_key(master_password, vault.vault_config.salt, **vault.vault_config.kdf_params.to_dict())
+        legacy = CredentialSchema(username="old_user", password="old_pass").to_str()
+        nonce, ciphertext = encrypt(key, encode_string_to_base64_bytes(legacy))
+        Vault.atomic_write_bytes(os.path.join(temp_vault_dir, "test_vault1", "ptr1.ptr"), ciphertext)
+        pointer = vault.vault_config.encrypted_pointers[0].model_copy(update={"nonce": nonce})
+        vault.vault_config.encrypted_pointers[0] = pointer
+        vault._reindex()
+
+        credentials = vault.get_pointer(master_password, "ptr1")
+        assert credentials.username == "old_user"
+        assert credentials.password == "old_pass"
+
+    def test_get_pointer_bytearray_password(self, temp_vault_dir):
+        """Test that a UTF-8 bytearray password works and can be wiped afterwards."""
+        vault = Vault("test_vault1", TIME=1, MEMORY=8192, PARALLELISM=1, load=False)
+        vault.updated_pointer("mäster", "ptr1", "user1", "pass1")
+        vault.lock()
+
+        password = bytearray("mäster".encode("utf-8"))
+        assert vault.get_pointer(password, "ptr1").password == "pass1"
+        password[:] = bytes(len(password))
+        assert vault.get_pointer("mäster", "ptr1").password == "pass1"
+
     def test_get_nonexistent_pointer(self, temp_vault_dir):
         """Test getting nonexistent pointer raises error."""
         vault = Vault("test_vault1", load=False)
@@ -124,6 +202,35 @@ class TestVault:
         with pytest.raises(Exception):
             credentials = vault.get_pointer(wrong_password, "ptr1")
 
+    def test_wrong_password_rejected_by_check_tag(self, temp_vault_dir):
+        """Test that the stored check tag rejects a wrong master password after reload."""
+        vault1 = Vault("test_vault1", load=False)
+        vault1.updated_pointer("test_password", "ptr1", "user1", "pass1")
+        vault1.update_vault()
+
+        vault2 = Vault("test_vault1", load=True)
+        assert vault2.vault_config.pw_tag == vault1.vault_config.pw_tag
+        with pytest.raises(DecryptionError, match="wrong master password"):
+            vault2.get_pointer("wrong_password", "ptr1")
+        with pytest.raises(DecryptionError, match="wrong master password"):
+            vault2.updated_pointer("wrong_password", "ptr2", "user2", "pass2")
+        assert vault2.list_pointers() == ["ptr1"]
+
+    def test_key_derived_once_until_lock(self, temp_vault_dir, derive_calls):
+        """Test that the vault key is cached per password and dropped by lock()."""
+        vault = Vault("test_vault1", load=False)
+        vault.updated_pointer("test_password", "ptr1", "user1", "pass1")
+        vault.updated_pointer("test_password", "ptr2", "user2", "pass2")
+        assert vault.get_pointer("test_password", "ptr1").username == "user1"
+        assert len(derive_calls) == 1
+
+        key, _ = vault._get_key("test_password")
+        vault.lock()
+        assert vault._key_cache == {}
+        assert key == bytearray(len(key))
+        assert vault.get_pointer("test_password", "ptr2").username == "user2"
+        assert len(derive_calls) == 2
+
     def test_list_pointers(self, temp_vault_dir):
         """Test listing pointers in vault."""
         vault = Vault("test_vault1", load=False)
@@ -137,6 +244,78 @@ class TestVault:
         assert "ptr1" in pointers
         assert "ptr2" in pointers
 
+    def test_get_all_pointers(self, temp_vault_dir, derive_calls):
+        """Test that every pointer is decrypted with one key derivation."""
+        vault = Vault("test_vault1", TIME=1, MEMORY=8192, PARALLELISM=1, load=False)
+        vault.updated_pointer("master_pass", "ptr1", "user1", "pass1")
+        vault.updated_pointer("master_pass", "ptr2", "user2", "pass2")
+        vault.lock()
+
+        derive_calls.clear()
+        creds = vault.get_all_pointers("master_pass")
+        assert list(creds) == ["ptr1", "ptr2"]
+        assert creds["ptr2"].username == "user2"
+        assert creds["ptr2"].password == "pass2"
+        assert len(derive_calls) == 1
+
+        with pytest.raises(DecryptionError):
+            vault.get_all_pointers("wrong_pass")
+
+    def test_unlock_with_keyring(self, temp_vault_dir, fake_keyring, derive_calls):
+        """Test that a keyring-cached key skips Argon2id in a new session."""
+        vault = Vault("test_vault1", TIME=1, MEMORY=8192, PARALLELISM=1, load=False)
+        vault.updated_pointer("master_pass", "ptr1", "user1", "pass1")
+        vault.update_vault()
+        vault.unlock("master_pass", use_keyring=True)
+        assert len(fake_keyring) == 1
+
+        derive_calls.clear()
+        vault2 = Vault("test_vault1")
+        vault2.unlock("master_pass", use_keyring=True)
+        assert vault2.get_pointer("master_pass", "ptr1").password == "pass1"
+        assert derive_calls == []
+
+        vault2.lock()
+        assert fake_keyring == {}
+
+    def test_keyring_entry_unlocks_with_any_password(self, temp_vault_dir, fake_keyring):
+        """Test that access to the keyring entry, not the password, gates unlock."""
+        vault = Vault("test_vault1", TIME=1, MEMORY=8192, PARALLELISM=1, load=False)
+        vault.updated_pointer("master_pass", "ptr1", "user1", "pass1")
+        vault.update_vault()
+        vault.unlock("master_pass", use_keyring=True)
+
+        vault2 = Vault("test_vault1")
+        vault2.unlock("anything", use_keyring=True)
+        assert vault2.get_pointer("anything", "ptr1").password == "pass1"
+
+        # without the keyring the password is still checked
+        with pytest.raises(DecryptionError):
+            Vault("test_vault1").get_pointer("anything", "ptr1")
+
+    def test_unlock_with_corrupt_keyring_entry(self, temp_vault_dir, fake_keyring):
+        """Test that an unreadable keyring entry is a miss and gets replaced."""
+        vault = Vault("test_vault1", TIME=1, MEMORY=8192, PARALLELISM=1, load=False)
+        vault.updated_pointer("master_pass", "ptr1", "user1", "pass1")
+        vault.lock()
+        fake_keyring[(storage._KEYRING_SERVICE, vault._keyring_entry())] = "!!not base64"
+        vault.unlock("master_pass", use_keyring=True)
+
+        (value,) = fake_keyring.values()
+        # only the 32-byte key is stored, nothing derived from the password
+        assert len(binascii.a2b_base64(value)) == 32
+        assert vault.get_pointer("master_pass", "ptr1").password == "pass1"
+
+    def test_roundtrip_with_four_lanes(self, temp_vault_dir):
+        """Test that a vault using four Argon2 lanes reloads and decrypts."""
+        vault = Vault("test_vault1", TIME=1, MEMORY=8192, PARALLELISM=4, load=False)
+        vault.updated_pointer("master_pass", "ptr1", "user1", "pass1")
+        vault.update_vault()
+
+        reloaded = Vault("test_vault1")
+        assert reloaded.vault_config.kdf_params.parallelism == 4
+        assert reloaded.get_pointer("master_pass", "ptr1").password == "pass1"
+
     def test_list_vaults(self, temp_vault_dir):
         """Test listing all vaults."""
         vault1 = Vault("vault1", load=False)
@@ -148,6 +327,16 @@ class TestVault:
         assert "vault1" in vaults
         assert "vault2" in vaults
 
+    def test_list_vaults_cached_until_directory_changes(self, temp_vault_dir):
+        """Test that the listing is reused and refreshed on a new directory."""
+        Vault("vault1", load=False).update_vault()
+        assert Vault.list_vaults() == ["vault1"]
+        assert Vault.list_vaults() is not Vault.list_vaults()
+
+        os.mkdir(os.path.join(temp_vault_dir, "vault2"))
+        os.utime(temp_vault_dir, ns=(0, os.stat(temp_vault_dir).st_mtime_ns + 1))
+        assert sorted(Vault.list_vaults()) == ["vault1", "vault2"]
+
     def test_vault_roundtrip(self, temp_vault_dir):
         """Test full roundtrip: create, save, load, verify."""
         # Create and populate vault
@@ -184,3 +373,29 @@ class TestVault:
         with open(path, "rb") as f:
             written = f.read()
         assert written == data
+
+    def test_atomic_write_bytes_replaces_without_leftovers(self, temp_vault_dir):
+        """Test that overwrites leave only the target file, with mode 0600."""
+        path = os.path.join(temp_vault_dir, "file.bin")
+        Vault.atomic_write_bytes(path, b"old")
+        Vault.atomic_write_bytes(path, b"new", sync=True)
+
+        with open(path, "rb") as f:
+            assert f.read() == b"new"
+        assert os.listdir(temp_vault_dir) == ["file.bin"]
+        assert os.stat(path).st_mode & 0o777 == 0o600
+
+    def test_atomic_write_bytes_skips_stale_temp_file(self, temp_vault_dir, monkeypatch):
+        """Test that a temp file left by an earlier process with our pid is skipped."""
+        monkeypatch.setattr(storage, "_tmp_counter", itertools.count())
+        path = os.path.join(temp_vault_dir, "file.bin")
+        stale = f"{path}.{os.getpid()}.0.tmp"
+        with open(stale, "wb") as f:
+            f.write(b"stale")
+
+        Vault.atomic_write_bytes(path, b"new")
+
+        with open(path, "rb") as f:
+            assert f.read() == b"new"
+        with open(stale, "rb") as f:
+            assert f.read() == b"stale"
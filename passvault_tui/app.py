@@ -1,9 +1,12 @@
 """Main TUI application using Textual."""
 
+import asyncio
+
 from textual.app import ComposeResult, App
 from textual.containers import Vertical, Horizontal
 from textual.widgets import Header, Footer, Label, Button, Select, OptionList, Static, Input
 from textual.message import Message
+from textual.markup import escape
 from textual.widgets. option_list import Option
 
 from passvault_core.clipboard import get_clipboard_manager
@@ -36,9 +39,14 @@ class CredentialPanel(Vertical):
 
     
     def compose(self) -> ComposeResult:
-        yield Label(f"Credential Details - Unlocked", id="credential-label")
-        yield Label(f"Id - {self.pointer_id}\n", id="pointer-label")
-        yield Label("\[c] Copy Username \n\[p] Copy Password \n\[ESC] Close", id="credential-help")
+        # One widget for the whole panel text: a single compose and render.
+        # The password itself is never shown, only offered for copying.
+        yield Static(
+            "Credential Details - Unlocked\n"
+            f"Id - {escape(self.pointer_id)}\n\n"
+            "\\[c] Copy Username \n\\[p] Copy Password \n\\[ESC] Close",
+            id="credential-body",
+        )
 
     def action_close_panel(self) -> None:
         """Close the credential panel."""
@@ -51,10 +59,10 @@ class CredentialPanel(Vertical):
         try:
             clipboard_manager = get_clipboard_manager()
             clipboard_manager.copy(self.username)
-            logger.info(f"Copied username to clipboard")
+            logger.info("Copied username to clipboard")
             self.app.notify("Username copied to clipboard")
         except Exception as e:
-            logger.error(f"Failed to copy username: {e}")
+            logger.error("Failed to copy username: %s", e)
             self.app.notify(f"Failed to copy: {e}", severity="error")
 
     def action_copy_password(self) -> None:
@@ -63,15 +71,15 @@ class CredentialPanel(Vertical):
         try:
             clipboard_manager = get_clipboard_manager()
             clipboard_manager.copy(self.password)
-            logger.info(f"Copied password to clipboard")
+            logger.info("Copied password to clipboard")
             self.app.notify("Password copied to clipboard")
         except Exception as e:
-            logger.error(f"Failed to copy password:  {e}")
+            logger.error("Failed to copy password: %s", e)
             self.app.notify(f"Failed to copy: {e}", severity="error")
 
     class CredentialClosed(Message):
         """Message when credential panel is closed."""
-        pass
+        __slots__ = ()
 
 class MasterPasswordPanel(Static):
     """Modal panel for entering master password."""
@@ -96,8 +104,11 @@ class MasterPasswordPanel(Static):
         """Handle input submission (Enter key)."""
         if event.control.id == "master-password-input":
             logger.debug("Input submitted via Enter")
-            password = event.value
-            logger. debug(f"Password entered: {len(password)} chars")
+            # Hand the password on as a wipeable bytearray and drop it from
+            # the input widget straight away.
+            password = bytearray(event.value.encode("utf-8"))
+            event.input.value = ""
+            logger.debug("Password entered: %d bytes", len(password))
             self.post_message(self. PasswordConfirmed(password))
 
     def action_cancel_password(self) -> None:
@@ -106,13 +117,16 @@ class MasterPasswordPanel(Static):
 
     class PasswordConfirmed(Message):
         """Message when password is confirmed."""
-        def __init__(self, password: str) -> None:
+        __slots__ = ("password",)
+
+        def __init__(self, password: bytearray) -> None:
+            # UTF-8 bytes; zeroed by the receiver once the key is derived
             self.password = password
             super().__init__()
 
     class PasswordCancelled(Message):
         """Message when password entry is cancelled."""
-        pass
+        __slots__ = ()
 
 class PassVaultApp(App):
     """Main PassVault TUI application."""
@@ -121,7 +135,6 @@ class PassVaultApp(App):
     SUB_TITLE = "A Simple TUI Password Manager"
     CSS_PATH = "style.css"
     
-    vaults_list = Vault. list_vaults()
     current_vault = None
 
     BINDINGS = [
@@ -131,22 +144,46 @@ class PassVaultApp(App):
     def compose(self) -> ComposeResult:
         """Compose the main layout."""
         yield Header()
-        yield Select(
-            options=[(vault_id, vault_id) for vault_id in self.vaults_list],
-            id="vault-selector"
-        )
+        yield Select(options=[], id="vault-selector")
         yield OptionList(id="pointers-list")
         yield Footer()
     
     def on_mount(self) -> None:
-        """Hide the Select widget on startup."""
-        self.query_one("#vault-selector", Select).display = False
-        self.query_one("#pointers-list", OptionList).display = False
+        """Hide the vault selector and pointer list until requested."""
+        # Options are filled on first reveal (action_select_vault), so
+        # startup does no vault directory I/O at all.
+        self._vault_ids: list[str] | None = None
+        # These two widgets live for the whole session; look them up once
+        self._selector = self.query_one("#vault-selector", Select)
+        self._pointers = self.query_one("#pointers-list", OptionList)
+        self._selector.display = False
+        self._pointers.display = False
+
+    def _refresh_vault_options(self, select: Select) -> None:
+        """Reload the selector options if the set of vaults on disk changed.
+
+        Vault.list_vaults answers from its mtime-keyed cache, so an
+        unchanged directory costs one stat and no widget update.
+        """
+        try:
+            vaults = Vault.list_vaults()
+        except FileNotFoundError:
+            logger.warning("Vault directory %s does not exist", Vault.path)
+            vaults = []
+        if vaults != self._vault_ids:
+            self._vault_ids = vaults
+            select.set_options((vault_id, vault_id) for vault_id in vaults)
     
 
+    def on_unmount(self) -> None:
+        """Wipe the open vault's key when the app shuts down."""
+        if self.current_vault is not None:
+            self.current_vault.lock()
+
     def action_select_vault(self) -> None:
         """Show the Select widget and focus it."""
-        select = self.query_one("#vault-selector", Select)
+        select = self._selector
+        self._refresh_vault_options(select)
         select.display = True
         self.set_focus(select)
 
@@ -154,75 +191,100 @@ class PassVaultApp(App):
         """Handle vault selection."""
         # If this is the vault selector
         if event. control.id == "vault-selector":
-            self.query_one("#vault-selector", Select).display = False
+            if event.value is Select.NULL:
+                return  # selection cleared; nothing to open
+            self._selector.display = False
             self.sub_title = f"Selected Vault:  {event.value}"
             
-            # Initialize vault and load pointers
-            self.current_vault = Vault(id=event.value)
+            # Initialize vault and load pointers; re-selecting the open vault
+            # keeps the existing session instead of re-reading its config
+            if self.current_vault is None or self.current_vault.vault_config.id != event.value:
+                if self.current_vault is not None:
+                    # wipe the previous vault's key before dropping it
+                    self.current_vault.lock()
+                self.current_vault = Vault(id=event.value)
             pointers = self. current_vault.list_pointers()
             
             # Update pointers list with OptionList
-            pointers_list = self.query_one("#pointers-list", OptionList)
-            pointers_list.clear_options()
-            
-            for pointer in pointers:
-                pointers_list. add_option(Option(pointer, id=pointer))
+            pointers_list = self._pointers
+            with self.batch_update():
+                pointers_list.clear_options()
+                pointers_list.add_options([Option(pointer, id=pointer) for pointer in pointers])
             
             pointers_list.display = True
             self.set_focus(pointers_list)
 
-    def on_master_password_panel_password_confirmed(self, message:  MasterPasswordPanel.PasswordConfirmed) -> None:
+    async def on_master_password_panel_password_confirmed(self, message:  MasterPasswordPanel.PasswordConfirmed) -> None:
         """Handle password confirmation."""
+        password_input = self.query_one("#master-password-input", Input)
+        error_label = self.query_one("#password-error", Static)
+        # Argon2id takes a few hundred ms; run it off the event loop so the
+        # UI keeps drawing, and block resubmits until it finishes.
+        password_input.disabled = True
+        error_label.update("Deriving key...")
+        # The selection can change while we await; show what was asked for.
+        pointer_id = self.selected_pointer
         try:
-            credential = self.current_vault.get_pointer(message.password, self.selected_pointer)
-            logger.debug(f"Retrieved credential for pointer {self.selected_pointer}")
-            self.query_one("#password-modal", MasterPasswordPanel).remove()
-            
-            # Display credential details panel
-            # Mount panel with data directly
-            self.mount(CredentialPanel(
-                username=credential.username,
-                password=credential.password,
-                pointer_id =self.selected_pointer,
-                id="credential-modal"
-            ))
+            try:
+                credential = await asyncio.to_thread(self.current_vault.get_pointer, message.password, pointer_id)
+            finally:
+                message.password[:] = bytes(len(message.password))
+            logger.debug("Retrieved credential for pointer %s", pointer_id)
+            if not self.query("#password-modal"):
+                return  # cancelled while the key was being derived
+            # Swap the password panel for the credential panel in one repaint
+            with self.batch_update():
+                await self.query_one("#password-modal", MasterPasswordPanel).remove()
+                # Display credential details panel
+                # Mount panel with data directly
+                await self.mount(CredentialPanel(
+                    username=credential.username,
+                    password=credential.password,
+                    pointer_id=pointer_id,
+                    id="credential-modal"
+                ))
 
         except Exception as e: 
-            logger.error(f"Failed to retrieve credential: {e}")
-            error_label = self.query_one("#password-error", Static)
-            error_label.update("Wrong password")
+            logger.error("Failed to retrieve credential: %s", e)
+            if self.query("#password-modal"):
+                error_label.update("Wrong password")
+                password_input.disabled = False
+                self.set_focus(password_input)
 
     def on_master_password_panel_password_cancelled(self, message: MasterPasswordPanel.PasswordCancelled) -> None:
         """Handle password cancellation."""
-        self.query_one("#password-modal", MasterPasswordPanel).remove()
+        existing = self.query("#password-modal")
+        if existing:
+            existing.remove()
         # Re-enable the OptionList
-        self.query_one("#pointers-list", OptionList).disabled = False
-        self. set_focus(self.query_one("#pointers-list", OptionList))
+        self._pointers.disabled = False
+        self. set_focus(self._pointers)
 
     def on_credential_panel_credential_closed(self, message: CredentialPanel. CredentialClosed) -> None:
         """Handle credential closure."""
         logger.debug("Credential panel close message received")
         self.query_one("#credential-modal", CredentialPanel).remove()
         # Re-enable the OptionList
-        self.query_one("#pointers-list", OptionList).disabled = False
-        self.set_focus(self.query_one("#pointers-list", OptionList))
+        self._pointers.disabled = False
+        self.set_focus(self._pointers)
 
-    def on_option_list_option_selected(self, event: OptionList. OptionSelected) -> None:
+    async def on_option_list_option_selected(self, event: OptionList. OptionSelected) -> None:
         """Handle pointer selection and show master password panel."""
         self.selected_pointer = event.option.id
         
         # Disable the OptionList
-        pointers_list = self.query_one("#pointers-list", OptionList)
+        pointers_list = self._pointers
         pointers_list.disabled = True
         
-        # Remove existing modal if present
-        try: 
-            self.query_one("#password-modal", MasterPasswordPanel).remove()
-        except:
-            pass
-        
-        # Mount new modal
-        self.mount(MasterPasswordPanel(id="password-modal"))
+        with self.batch_update():
+            # Remove existing modal if present; awaited so its id is free
+            # before the replacement mounts
+            existing = self.query("#password-modal")
+            if existing:
+                await existing.remove()
+            
+            # Mount new modal
+            await self.mount(MasterPasswordPanel(id="password-modal"))
 
 def run():
     """Run the TUI application."""
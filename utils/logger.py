@@ -1,6 +1,8 @@
 """Logger configuration for PassVault."""
 
+import atexit
 import logging
+from logging.handlers import MemoryHandler
 from pathlib import Path
 
 
@@ -28,8 +30,8 @@ def setup_logger(name: str, log_file: str | None = None) -> logging.Logger:
     # Create log directory if it doesn't exist
     log_file.parent.mkdir(parents=True, exist_ok=True)
     
-    # File handler
-    file_handler = logging.FileHandler(log_file)
+    # File handler; the file is opened on the first record written
+    file_handler = logging.FileHandler(log_file, encoding="utf-8", delay=True)
     file_handler.setLevel(logging.DEBUG)
     
     # Formatter
@@ -39,8 +41,13 @@ def setup_logger(name: str, log_file: str | None = None) -> logging.Logger:
     )
     file_handler.setFormatter(formatter)
     
+    # Buffer records in memory so debug logging on the UI path does not
+    # write to disk per call; warnings and errors flush immediately.
+    memory_handler = MemoryHandler(capacity=1000, flushLevel=logging.WARNING, target=file_handler)
+    
     # Add handler to logger (avoid duplicates)
     if not logger.handlers:
-        logger.addHandler(file_handler)
+        logger.addHandler(memory_handler)
+        atexit.register(memory_handler.flush)
     
     return logger